@@ -0,0 +1,81 @@
+"""Memory per scheduled job with plain and compressed plan storage.
+
+Run with:
+    uv run benchmarks/bench_plan_storage.py --jobs 5000 --body-words 1500
+"""
+
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler  # noqa: E402
+
+import plan_storage  # noqa: E402
+
+
+WORDS = (
+    "hello team pizza friday kitchen birthday report quarterly revenue meeting "
+    "please find attached summary customer invoice order delivery schedule the "
+    "a of to and in for with on at by from welcome regards thanks update"
+).split()
+
+
+def synthetic_plan(rng: random.Random, body_words: int) -> str:
+    """Plan with an email-like body, similar to what agents put into the arguments."""
+    body = " ".join(rng.choice(WORDS) for _ in range(body_words))
+    return json.dumps(
+        {
+            "send_email": {
+                "mcp-service-endpoint": "http://email-mcp:3002/mcp/",
+                "mcp-tool-name": "send_email",
+                "mcp-tool-arguments": {"email": "team@company.com", "message": body},
+            }
+        }
+    )
+
+
+async def noop_job(plan, *, user_id, description):
+    pass
+
+
+def measure(pack, jobs: int, body_words: int, seed: int) -> int:
+    """Bytes retained by the scheduler jobs, including their plans."""
+    rng = random.Random(seed)
+    scheduler = AsyncIOScheduler()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(jobs):
+        # plans are created here like they arrive with the tool calls,
+        # so only what the job keeps stays allocated
+        scheduler.add_job(
+            noop_job,
+            "interval",
+            hours=1,
+            args=[pack(synthetic_plan(rng, body_words))],
+            kwargs={"user_id": f"user_{i % 100}", "description": f"job {i}"},
+        )
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--body-words", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=0)
+    cli_args = parser.parse_args()
+
+    params = (cli_args.jobs, cli_args.body_words, cli_args.seed)
+    plain = measure(lambda plan: plan, *params) / cli_args.jobs
+    compressed = measure(plan_storage.pack, *params) / cli_args.jobs
+
+    print(f"jobs: {cli_args.jobs}, words in the plan body: {cli_args.body_words}")
+    print(f"plain plans:      {plain:.0f} bytes per job")
+    print(f"compressed plans: {compressed:.0f} bytes per job")
+    print(f"reduction:        {plain / compressed:.1f}x")
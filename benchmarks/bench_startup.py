@@ -0,0 +1,106 @@
+"""Startup time of the service: import of `main` and time to the first HTTP response.
+
+Run with:
+    uv run benchmarks/bench_startup.py --runs 5 --max-import 1.5 --max-first-request 3
+
+Exits with code 1 when the median of a measurement is over its budget,
+pass 0 as a budget to disable it.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).parent.parent
+
+IMPORT_SCRIPT = """
+import time
+started = time.perf_counter()
+import main
+print(time.perf_counter() - started)
+"""
+
+
+def _env(**extra) -> dict[str, str]:
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"), **extra)
+    env.pop("SNAPSHOT_PATH", None)
+    return env
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_request(timeout: float = 30) -> float:
+    """Seconds from the process spawn to the first HTTP response of the server."""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "src/main.py"],
+        cwd=ROOT,
+        env=_env(MCP_HOST="127.0.0.1", MCP_PORT=str(port)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                connection.request("GET", "/mcp/")
+                connection.getresponse()
+                return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"Server did not respond in {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import", type=float, default=1.5)
+    parser.add_argument("--max-first-request", type=float, default=3.0)
+    cli_args = parser.parse_args()
+
+    import_seconds = statistics.median(measure_import() for _ in range(cli_args.runs))
+    first_request_seconds = statistics.median(
+        measure_first_request() for _ in range(cli_args.runs)
+    )
+    print(
+        json.dumps(
+            {
+                "import_seconds": round(import_seconds, 3),
+                "first_request_seconds": round(first_request_seconds, 3),
+            }
+        )
+    )
+
+    over_budget = (cli_args.max_import and import_seconds > cli_args.max_import) or (
+        cli_args.max_first_request
+        and first_request_seconds > cli_args.max_first_request
+    )
+    sys.exit(1 if over_budget else 0)
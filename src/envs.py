@@ -14,3 +14,30 @@ EXECUTION_STRATEGY = os.environ.get("EXECUTION_STRATEGY", "sequential")
 
 WORKER_ENDPOINT = os.environ.get("WORKER_ENDPOINT")
 WORKER_TOOL_NAME = os.environ.get("WORKER_TOOL_NAME")
+
+# span tracing of plan executions, exported as OTLP/JSON lines into rotating files
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() in ("1", "true")
+TRACING_SAMPLE_RATIO = float(os.environ.get("TRACING_SAMPLE_RATIO", 1.0))
+TRACING_EXPORT_PATH = os.environ.get("TRACING_EXPORT_PATH", "traces/spans.otlp.jsonl")
+TRACING_EXPORT_MAX_BYTES = int(os.environ.get("TRACING_EXPORT_MAX_BYTES", 10_000_000))
+TRACING_EXPORT_BACKUP_COUNT = int(os.environ.get("TRACING_EXPORT_BACKUP_COUNT", 5))
+
+# plans longer than this number of characters are stored compressed in the jobs
+PLAN_COMPRESSION_THRESHOLD = int(os.environ.get("PLAN_COMPRESSION_THRESHOLD", 4096))
+PLAN_COMPRESSION_LEVEL = int(os.environ.get("PLAN_COMPRESSION_LEVEL", 6))
+
+# runtime snapshot saved on shutdown and loaded on start, empty to disable
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "")
+# seconds to wait for the executions in flight on shutdown
+DRAIN_TIMEOUT = float(os.environ.get("DRAIN_TIMEOUT", 30))
+# fires missed while the service was down are run once if not older than this
+CATCH_UP_GRACE_TIME = float(os.environ.get("CATCH_UP_GRACE_TIME", 300))
+# run again the executions interrupted by the shutdown, they may repeat tool calls
+RESUME_INTERRUPTED_EXECUTIONS = os.environ.get(
+    "RESUME_INTERRUPTED_EXECUTIONS", "false"
+).lower() in ("1", "true")
+
+# number of job changes kept to replay to the clients of the change feed
+JOB_EVENTS_BUFFER_SIZE = int(os.environ.get("JOB_EVENTS_BUFFER_SIZE", 1000))
+# seconds between keepalive comments in the change stream
+JOB_EVENTS_KEEPALIVE = float(os.environ.get("JOB_EVENTS_KEEPALIVE", 15))
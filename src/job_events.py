@@ -0,0 +1,194 @@
+import asyncio
+import json
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any
+
+from apscheduler.events import (
+    EVENT_JOB_ADDED,
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_MODIFIED,
+    EVENT_JOB_REMOVED,
+    EVENT_JOB_SUBMITTED,
+)
+
+import envs
+
+EVENT_NAMES = {
+    EVENT_JOB_ADDED: "added",
+    EVENT_JOB_MODIFIED: "modified",
+    EVENT_JOB_REMOVED: "removed",
+    EVENT_JOB_SUBMITTED: "fired",
+    EVENT_JOB_EXECUTED: "completed",
+    EVENT_JOB_ERROR: "failed",
+    EVENT_JOB_MISSED: "missed",
+    EVENT_JOB_MAX_INSTANCES: "skipped",
+}
+
+JOB_EVENTS_MASK = 0
+for _code in EVENT_NAMES:
+    JOB_EVENTS_MASK |= _code
+
+
+class JobEventFeed:
+    """Bounded replay buffer of job changes with resumable sequence numbers.
+
+    Built on the scheduler listener events, so clients receive only the changes
+    instead of polling the full list of jobs.
+    """
+
+    def __init__(self, size: int):
+        self._scheduler = None
+        self._events = deque(maxlen=size)
+        self._last_seq = 0
+        self._job_users = {}
+        # users of removed jobs are kept for a while, because one-off jobs are
+        # removed when they fire, before they complete
+        self._removed_jobs = deque(maxlen=size)
+        # runs deferred by the drain return normally, they did not complete
+        self._deferred_runs = set()
+        self._changed = asyncio.Event()
+        self._closed = False
+        # sequence numbers restart with the process, so they are resumable only
+        # with the epoch of the process that numbered them
+        self.epoch = uuid.uuid4().hex[:8]
+
+    def attach(self, scheduler):
+        self._scheduler = scheduler
+        scheduler.add_listener(self.on_scheduler_event, JOB_EVENTS_MASK)
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        """End all the streams, they would keep the HTTP server from stopping."""
+        self._closed = True
+        self._changed.set()
+
+    def mark_deferred(self, job_id: str, scheduled_run_time: datetime):
+        """Report the run as `deferred` instead of `completed` when it returns."""
+        self._deferred_runs.add((job_id, scheduled_run_time))
+
+    def on_scheduler_event(self, event):
+        job_id = event.job_id
+        event_name = EVENT_NAMES[event.code]
+        if event.code == EVENT_JOB_EXECUTED:
+            run = (job_id, event.scheduled_run_time)
+            if run in self._deferred_runs:
+                self._deferred_runs.discard(run)
+                event_name = "deferred"
+
+        change = {
+            "event": event_name,
+            "job_id": job_id,
+            "time": datetime.now(timezone.utc).isoformat(),
+        }
+
+        if event.code in (EVENT_JOB_ADDED, EVENT_JOB_MODIFIED):
+            job = self._scheduler.get_job(job_id)
+            if job is not None:
+                self._job_users[job_id] = job.kwargs.get("user_id")
+                change["description"] = job.kwargs.get("description")
+                change["next_run_time"] = _isoformat(job.next_run_time)
+        elif event.code == EVENT_JOB_SUBMITTED:
+            change["scheduled_run_time"] = _isoformat(event.scheduled_run_times[0])
+        elif event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED):
+            change["scheduled_run_time"] = _isoformat(event.scheduled_run_time)
+            if event.exception is not None:
+                change["error"] = str(event.exception)
+
+        change["user_id"] = self._job_users.get(job_id)
+        if event.code == EVENT_JOB_REMOVED:
+            self._forget_user_later(job_id)
+
+        self.publish(change)
+
+    def _forget_user_later(self, job_id: str):
+        if len(self._removed_jobs) == self._removed_jobs.maxlen:
+            oldest = self._removed_jobs[0]
+            # the id could have been reused by a new job
+            if self._scheduler.get_job(oldest) is None:
+                self._job_users.pop(oldest, None)
+        self._removed_jobs.append(job_id)
+
+    def publish(self, change: dict[str, Any]):
+        self._last_seq += 1
+        change["seq"] = self._last_seq
+        self._events.append(change)
+
+        # wake up all the streams waiting for changes
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def since(
+        self,
+        seq: int,
+        user_id: str,
+        limit: int | None = None,
+        epoch: str | None = None,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Changes of the user after `seq`, and whether some changes were lost.
+
+        Changes are lost when `seq` is older than the replay buffer or was
+        numbered by an earlier process, then the client should list the jobs
+        again and continue from `last_seq`.
+        """
+        if (epoch is not None and epoch != self.epoch) or seq > self._last_seq:
+            # all the kept changes are new to the client
+            seq, reset = 0, True
+        else:
+            oldest_seq = self._events[0]["seq"] if self._events else self._last_seq + 1
+            reset = seq < oldest_seq - 1
+
+        changes = []
+        for change in self._events:
+            if change["seq"] > seq and change["user_id"] == user_id:
+                changes.append(change)
+                if limit is not None and len(changes) == limit:
+                    break
+        return changes, reset
+
+    async def stream(self, user_id: str, seq: int, epoch: str | None = None):
+        """Server-sent events with the changes of the user after `seq`.
+
+        Event ids are `<epoch>-<seq>`, see `parse_event_id`. The stream ends
+        when the feed is closed.
+        """
+        while not self._closed:
+            changed, last_seq = self._changed, self._last_seq
+            changes, reset = self.since(seq, user_id, epoch=epoch)
+            if reset:
+                data = json.dumps({"epoch": self.epoch, "last_seq": last_seq})
+                yield f"event: reset\ndata: {data}\n\n"
+            for change in changes:
+                yield f"id: {self.epoch}-{change['seq']}\nevent: {change['event']}\ndata: {json.dumps(change)}\n\n"
+
+            # other users' changes move the cursor too, so they are not scanned again
+            seq, epoch = last_seq, self.epoch
+
+            try:
+                await asyncio.wait_for(changed.wait(), envs.JOB_EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+
+def parse_event_id(event_id: str) -> tuple[str | None, int]:
+    """Epoch and sequence number of an event id, ids without epoch are plain numbers."""
+    epoch, _, seq = event_id.rpartition("-")
+    return epoch or None, int(seq)
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+feed = JobEventFeed(envs.JOB_EVENTS_BUFFER_SIZE)
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import math
+import os
+import pickle
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED
+
+import envs
+import mcp_client
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class ExecutionTracker:
+    """Tracks plan executions in flight, so the service can drain them on shutdown.
+
+    Executions that could not complete before the shutdown are kept as
+    pending catch-ups and saved in the runtime snapshot.
+    """
+
+    def __init__(self):
+        self.draining = False
+        self.pending_catch_ups = []
+        self._in_flight = {}
+
+    @contextmanager
+    def track(self, job_id: str | None, plan: Any, *, user_id: str, description: str):
+        task = asyncio.current_task()
+        self._in_flight[task] = {
+            "job_id": job_id,
+            "plan": plan,
+            "user_id": user_id,
+            "description": description,
+            "started_at": datetime.now(timezone.utc),
+        }
+        try:
+            yield
+        finally:
+            del self._in_flight[task]
+
+    def defer(self, job_id: str | None, plan: Any, *, user_id: str, description: str):
+        """Keep the execution fired during the drain to run it after the restart."""
+        self.pending_catch_ups.append(
+            {
+                "job_id": job_id,
+                "plan": plan,
+                "user_id": user_id,
+                "description": description,
+                "started": False,
+            }
+        )
+
+    def resume(self) -> list[dict[str, Any]]:
+        """Stop draining and return the executions deferred during the drain."""
+        self.draining = False
+        deferred = [c for c in self.pending_catch_ups if not c["started"]]
+        self.pending_catch_ups = [c for c in self.pending_catch_ups if c["started"]]
+        return deferred
+
+    def in_flight(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "job_id": execution["job_id"],
+                "user_id": execution["user_id"],
+                "description": execution["description"],
+                "started_at": execution["started_at"],
+            }
+            for execution in self._in_flight.values()
+        ]
+
+    async def drain(self, timeout: float):
+        """Wait for the executions in flight, cancel the ones left after the timeout."""
+        self.draining = True
+        if not self._in_flight:
+            return
+
+        logger.info(
+            f"Draining {len(self._in_flight)} executions in flight, timeout {timeout}s"
+        )
+        _, pending = await asyncio.wait(list(self._in_flight), timeout=timeout)
+
+        for task in pending:
+            execution = self._in_flight[task]
+            logger.warning(
+                f"Execution of job {execution['job_id']} did not finish in time, cancelling"
+            )
+            self.pending_catch_ups.append(
+                {
+                    "job_id": execution["job_id"],
+                    "plan": execution["plan"],
+                    "user_id": execution["user_id"],
+                    "description": execution["description"],
+                    "started": True,
+                }
+            )
+            task.cancel()
+
+        if pending:
+            await asyncio.wait(pending)
+
+
+tracker = ExecutionTracker()
+
+
+def save_snapshot(path: str, scheduler):
+    """Save next fire times, pending catch-ups and endpoint health of the service."""
+    jobs = [
+        {
+            "id": job.id,
+            "name": job.name,
+            "trigger": job.trigger,
+            "args": job.args,
+            "kwargs": job.kwargs,
+            "next_run_time": job.next_run_time,
+            "misfire_grace_time": job.misfire_grace_time,
+            "coalesce": job.coalesce,
+            "max_instances": job.max_instances,
+        }
+        for job in scheduler.get_jobs()
+    ]
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": datetime.now(timezone.utc),
+        "jobs": jobs,
+        "catch_ups": tracker.pending_catch_ups,
+        "endpoint_health": mcp_client.endpoint_health,
+    }
+
+    # write and rename, so a crash during the save never leaves a broken snapshot
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+    logger.info(
+        f"Saved snapshot with {len(jobs)} jobs and "
+        f"{len(tracker.pending_catch_ups)} pending catch-ups to {path}"
+    )
+
+
+def load_snapshot(path: str, scheduler, func) -> bool:
+    """Restore the jobs with their next fire times, catch-ups and endpoint health.
+
+    Fires missed while the service was down are run once if they are not older
+    than `CATCH_UP_GRACE_TIME`, keeping the missed fire time so the following
+    fires stay on the original schedule. Executions interrupted by the shutdown are run
+    again only if `RESUME_INTERRUPTED_EXECUTIONS` is set, because they may
+    have already called some of the tools.
+    """
+    if not os.path.exists(path):
+        return False
+
+    try:
+        snapshot = _read_snapshot(path)
+    except Exception as e:
+        # moved aside, so the next save does not overwrite the jobs in it
+        bad_path = f"{path}.bad"
+        os.replace(path, bad_path)
+        logger.error(f"Error loading snapshot {path}, moved to {bad_path}: {e}")
+        return False
+
+    now = datetime.now(timezone.utc)
+    caught_up_graces = {}
+    for job in snapshot["jobs"]:
+        next_run_time = job["next_run_time"]
+        misfire_grace_time = job["misfire_grace_time"]
+        if next_run_time is not None and next_run_time < now:
+            if (now - next_run_time).total_seconds() <= envs.CATCH_UP_GRACE_TIME:
+                logger.info(f"Catching up missed fire of job {job['id']}")
+                # the scheduler runs the missed fire if it is within the misfire
+                # grace time, the original one is restored after the catch-up
+                caught_up_graces[job["id"]] = misfire_grace_time
+                if misfire_grace_time is not None:
+                    misfire_grace_time = max(
+                        misfire_grace_time, math.ceil(envs.CATCH_UP_GRACE_TIME)
+                    )
+            else:
+                next_run_time = job["trigger"].get_next_fire_time(None, now)
+
+        scheduler.add_job(
+            func,
+            trigger=job["trigger"],
+            args=job["args"],
+            kwargs=job["kwargs"],
+            id=job["id"],
+            name=job["name"],
+            misfire_grace_time=misfire_grace_time,
+            coalesce=job["coalesce"],
+            max_instances=job["max_instances"],
+            next_run_time=next_run_time,
+            replace_existing=True,
+        )
+
+    for catch_up in snapshot["catch_ups"]:
+        if catch_up["started"] and not envs.RESUME_INTERRUPTED_EXECUTIONS:
+            logger.warning(
+                f"Execution of job {catch_up['job_id']} was interrupted by the shutdown, not resuming"
+            )
+            continue
+
+        logger.info(f"Running pending execution of job {catch_up['job_id']}")
+        # no trigger means running once as soon as possible
+        scheduler.add_job(
+            func,
+            args=[catch_up["plan"]],
+            kwargs={
+                "user_id": catch_up["user_id"],
+                "description": catch_up["description"],
+            },
+        )
+
+    if caught_up_graces:
+        _restore_misfire_grace_times(scheduler, caught_up_graces)
+
+    mcp_client.endpoint_health.update(snapshot["endpoint_health"])
+
+    logger.info(
+        f"Loaded snapshot from {snapshot['saved_at']} with {len(snapshot['jobs'])} jobs"
+    )
+    return True
+
+
+def _read_snapshot(path: str) -> dict[str, Any]:
+    with open(path, "rb") as f:
+        snapshot = pickle.load(f)
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {snapshot.get('version')}")
+    return snapshot
+
+
+def _restore_misfire_grace_times(scheduler, graces: dict[str, int | None]):
+    def on_caught_up(event):
+        if event.job_id not in graces:
+            return
+
+        misfire_grace_time = graces.pop(event.job_id)
+        # one-off jobs are removed once they fire
+        if scheduler.get_job(event.job_id) is not None:
+            scheduler.modify_job(event.job_id, misfire_grace_time=misfire_grace_time)
+        if not graces:
+            scheduler.remove_listener(on_caught_up)
+
+    scheduler.add_listener(
+        on_caught_up, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+    )
@@ -1,14 +1,22 @@
 import asyncio
 import json
 import pprint
+import signal
+import time
 from datetime import datetime
 from typing import Annotated
 
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
 import logging
 
 import envs
+import job_events
+import lifecycle
 import mcp_client
+import plan_storage
+import tracing
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
@@ -26,7 +34,8 @@ mcp_server = FastMCP(
 )
 
 
-scheduler = AsyncIOScheduler()
+scheduler = AsyncIOScheduler(executors={"default": tracing.JobRunExecutor()})
+job_events.feed.attach(scheduler)
 
 
 PLAN_SCHEMA_ANNOTATION = (
@@ -36,7 +45,7 @@ PLAN_SCHEMA_ANNOTATION = (
 
 
 def validate_plan(plan: Annotated[str, PLAN_SCHEMA_ANNOTATION]):
-    logger.info(f"Validate plan: {plan}")
+    logger.info(f"Validate plan: {plan_storage.abbreviate(plan)}")
 
     try:
         json_plan = json.loads(plan)
@@ -77,9 +86,55 @@ async def execute_plan(
     and get description for the job."""
     logger.info(f"Executing plan for user {user_id} with description {description}")
 
+    job_run = tracing.current_job_run.get()
+    job_id = job_run.job_id if job_run else None
+
+    if lifecycle.tracker.draining:
+        logger.warning(f"Scheduler is draining, deferring execution of job {job_id}")
+        lifecycle.tracker.defer(job_id, plan, user_id=user_id, description=description)
+        if job_run is not None:
+            job_events.feed.mark_deferred(job_id, job_run.scheduled_run_time)
+        return
+
+    started_ns = time.time_ns()
+    fired_ns = None
+    if job_run is not None:
+        fired_ns = int(job_run.scheduled_run_time.timestamp() * 1_000_000_000)
+
+    with (
+        lifecycle.tracker.track(job_id, plan, user_id=user_id, description=description),
+        tracing.span(
+            "scheduler.job",
+            attributes={
+                "job.id": job_id,
+                "user.id": user_id,
+                "execution.strategy": envs.EXECUTION_STRATEGY,
+            },
+            start_ns=fired_ns,
+        ),
+    ):
+        if job_run is not None:
+            tracing.record_span(
+                "scheduler.trigger_fire",
+                fired_ns,
+                max(job_run.submitted_ns, fired_ns),
+                attributes={"scheduled_run_time": job_run.scheduled_run_time},
+            )
+            tracing.record_span(
+                "scheduler.queue_wait", job_run.submitted_ns, started_ns
+            )
+
+        with tracing.span("plan.unpack"):
+            plan = plan_storage.unpack(plan)
+
+        await _execute_plan(plan, user_id=user_id)
+
+
+async def _execute_plan(plan: str, *, user_id: str):
     if envs.EXECUTION_STRATEGY == "sequential":
         logger.info("Executing plan sequentially")
-        json_plan = json.loads(plan)
+        with tracing.span("plan.decode", attributes={"plan.size": len(plan)}):
+            json_plan = json.loads(plan)
 
         for action_id, action in json_plan.items():
             logger.info(f"Executing action {action_id}")
@@ -89,17 +144,32 @@ async def execute_plan(
             mcp_tool_args = action.get("mcp-tool-arguments", {})
 
             logger.info(
-                f"Calling tool {mcp_tool_name} at {mcp_endpoint} with args: {mcp_tool_args}"
+                f"Calling tool {mcp_tool_name} at {mcp_endpoint} with args: {plan_storage.abbreviate(mcp_tool_args)}"
             )
-            await mcp_client.call_tool(mcp_endpoint, mcp_tool_name, mcp_tool_args)
+            with tracing.span(
+                "plan.action",
+                attributes={
+                    "action.id": action_id,
+                    "mcp.endpoint": mcp_endpoint,
+                    "mcp.tool": mcp_tool_name,
+                },
+            ):
+                await mcp_client.call_tool(mcp_endpoint, mcp_tool_name, mcp_tool_args)
     elif envs.EXECUTION_STRATEGY == "worker":
         logger.info("Executing plan in a worker")
         # execute plan in a worker
-        await mcp_client.call_tool(
-            envs.WORKER_ENDPOINT,
-            envs.WORKER_TOOL_NAME,
-            {"user_id": user_id, "str_json_plan": plan},
-        )
+        with tracing.span(
+            "plan.worker",
+            attributes={
+                "mcp.endpoint": envs.WORKER_ENDPOINT,
+                "mcp.tool": envs.WORKER_TOOL_NAME,
+            },
+        ):
+            await mcp_client.call_tool(
+                envs.WORKER_ENDPOINT,
+                envs.WORKER_TOOL_NAME,
+                {"user_id": user_id, "str_json_plan": plan},
+            )
     else:
         raise ValueError(
             f"Invalid execution strategy: {envs.EXECUTION_STRATEGY}. Scheduler is misconfigured."
@@ -109,17 +179,16 @@ async def execute_plan(
 @mcp_server.tool
 def list_scheduled_jobs(
     user_id: Annotated[str, "The id of the user who is listing the jobs"],
+    summary: Annotated[
+        bool, "Show only the size of the plans instead of the plans themselves"
+    ] = False,
 ) -> Annotated[str, "JSON-formatted list of scheduled jobs"]:
     """List all scheduled jobs."""
     try:
         jobs = scheduler.get_jobs()
         # no need to print the `func` because they all call the same -- MCP tool
         result = {
-            job.id: {
-                "description": job.kwargs.get("description"),
-                "args": job.args,
-                "next_run_time": job.next_run_time,
-            }
+            job.id: _describe_job(job, summary)
             for job in jobs
             if job.kwargs.get("user_id") == user_id
         }
@@ -129,6 +198,94 @@ def list_scheduled_jobs(
         return f"Error listing scheduled jobs: {e}"
 
 
+def _describe_job(job, summary: bool) -> dict:
+    # jobs added before the scheduler start have no next run time yet
+    next_run_time = getattr(job, "next_run_time", None)
+    if summary:
+        # plans are never decompressed in the summary
+        return {
+            "description": job.kwargs.get("description"),
+            "plan_size": sum(plan_storage.plan_size(arg) for arg in job.args),
+            "next_run_time": next_run_time,
+        }
+
+    return {
+        "description": job.kwargs.get("description"),
+        "args": tuple(plan_storage.unpack(arg) for arg in job.args),
+        "next_run_time": next_run_time,
+    }
+
+
+@mcp_server.tool
+def get_job_changes(
+    user_id: Annotated[str, "The id of the user whose job changes to get"],
+    since_seq: Annotated[
+        int, "Sequence number of the last received change, 0 to get all kept changes"
+    ] = 0,
+    limit: Annotated[int, "Maximum number of changes to return"] = 100,
+    epoch: Annotated[
+        str | None, "Epoch returned with `since_seq` by the previous call"
+    ] = None,
+) -> Annotated[
+    str, "JSON with the changes of the jobs and the sequence to resume from"
+]:
+    """
+    Returns jobs added, fired, completed, failed or removed after `since_seq`.
+    Pass the returned `last_seq` and `epoch` to the next call to get only new changes.
+    If `reset` is true some changes were lost, list the jobs again.
+    The same changes are streamed as server-sent events at GET /jobs/changes?user_id=...
+    """
+    if limit < 1:
+        logger.error(f"Invalid limit {limit} of job changes")
+        return f"Error getting job changes: limit must be at least 1, got {limit}"
+
+    changes, reset = job_events.feed.since(since_seq, user_id, limit, epoch)
+    if len(changes) == limit:
+        last_seq = changes[-1]["seq"]
+    else:
+        last_seq = job_events.feed.last_seq
+    return json.dumps(
+        {
+            "changes": changes,
+            "epoch": job_events.feed.epoch,
+            "last_seq": last_seq,
+            "reset": reset,
+        }
+    )
+
+
+@mcp_server.custom_route("/jobs/changes", methods=["GET"])
+async def stream_job_changes(request: Request) -> Response:
+    """Server-sent events with the job changes of the user.
+
+    Resumes after the `Last-Event-ID` header or the `since_seq` and `epoch`
+    query parameters.
+    """
+    user_id = request.query_params.get("user_id")
+    if not user_id:
+        return PlainTextResponse("The user_id parameter is required", status_code=400)
+
+    try:
+        if "last-event-id" in request.headers:
+            epoch, since_seq = job_events.parse_event_id(
+                request.headers["last-event-id"]
+            )
+        else:
+            epoch = request.query_params.get("epoch")
+            since_seq = int(request.query_params.get("since_seq", 0))
+    except ValueError:
+        return PlainTextResponse(
+            "The sequence number must be an integer", status_code=400
+        )
+
+    logger.info(f"Streaming job changes for user {user_id} since {since_seq}")
+    return StreamingResponse(
+        job_events.feed.stream(user_id, since_seq, epoch),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 @mcp_server.tool
 def remove_scheduled_job(job_id: Annotated[str, "The id of the job to remove"]):
     """
@@ -204,7 +361,7 @@ def schedule_tool_call_by_cron(
             execute_plan,
             "cron",
             **cron_params,
-            args=[execution_plan],
+            args=[plan_storage.pack(execution_plan)],
             kwargs={"user_id": user_id, "description": description},
         )
         logger.info(f"Scheduled job {job.id}")
@@ -267,7 +424,7 @@ def schedule_tool_call_at_interval(
             execute_plan,
             "interval",
             **interval_params,
-            args=[execution_plan],
+            args=[plan_storage.pack(execution_plan)],
             kwargs={"user_id": user_id, "description": description},
         )
         logger.info(f"Scheduled job {job.id}")
@@ -299,7 +456,7 @@ def schedule_tool_call_once_at_date(
             execute_plan,
             "date",
             run_date=datetime.strptime(run_date, "%Y-%m-%d %H:%M:%S"),
-            args=[execution_plan],
+            args=[plan_storage.pack(execution_plan)],
             kwargs={"user_id": user_id, "description": description},
         )
         logger.info(f"Scheduled job {job.id}")
@@ -332,10 +489,122 @@ def set_worker_tool_name(worker_tool_name: Annotated[str, "Worker tool name"]):
     return "Worker tool name set"
 
 
+@mcp_server.tool(tags=["admin"])
+def drain_scheduler():
+    """Stops new job fires before a restart, executions in flight keep running"""
+    # before the start the scheduler is started paused instead
+    if scheduler.running:
+        scheduler.pause()
+    lifecycle.tracker.draining = True
+    return f"Scheduler is draining, {len(lifecycle.tracker.in_flight())} executions in flight"
+
+
+@mcp_server.tool(tags=["admin"])
+def resume_scheduler():
+    """Cancels the drain, executions deferred during the drain run right away"""
+    deferred = lifecycle.tracker.resume()
+    for catch_up in deferred:
+        # no trigger means running once as soon as possible
+        scheduler.add_job(
+            execute_plan,
+            args=[catch_up["plan"]],
+            kwargs={
+                "user_id": catch_up["user_id"],
+                "description": catch_up["description"],
+            },
+        )
+    if scheduler.running:
+        scheduler.resume()
+    return f"Scheduler resumed, {len(deferred)} deferred executions scheduled"
+
+
+@mcp_server.tool(tags=["admin"])
+def get_runtime_status() -> Annotated[str, "Formatted runtime status"]:
+    """Returns executions in flight, pending catch-ups and health of the endpoints"""
+    return pprint.pformat(
+        {
+            "draining": lifecycle.tracker.draining,
+            "in_flight": lifecycle.tracker.in_flight(),
+            "pending_catch_ups": len(lifecycle.tracker.pending_catch_ups),
+            "endpoint_health": mcp_client.endpoint_health,
+        },
+        indent=4,
+    )
+
+
+# set when the snapshot could not be restored, it is then never overwritten
+_snapshot_load_failed = False
+
+
+def _save_snapshot():
+    if envs.SNAPSHOT_PATH and not _snapshot_load_failed:
+        lifecycle.save_snapshot(envs.SNAPSHOT_PATH, scheduler)
+
+
+async def shutdown():
+    """Drain the executions in flight and save the runtime snapshot."""
+    scheduler.pause()
+    # saved before the drain too, the process can be killed before the drain ends
+    _save_snapshot()
+    await lifecycle.tracker.drain(envs.DRAIN_TIMEOUT)
+    _save_snapshot()
+
+    scheduler.shutdown(wait=False)
+
+
+def _on_shutdown_signal(signum):
+    # the HTTP server stops on the signal and re-raises it after the stop,
+    # the process must survive it to drain the executions in flight
+    if job_events.feed.closed:
+        return
+
+    logger.info(f"Received signal {signal.Signals(signum).name}, shutting down")
+    job_events.feed.close()
+
+
+async def start_scheduler():
+    """Restore the snapshot and start the scheduler while the HTTP server binds.
+
+    Jobs scheduled before the start are kept as pending and added on the start,
+    the scheduler starts paused if it was drained before the start.
+    """
+    global _snapshot_load_failed
+
+    loaded = False
+    if envs.SNAPSHOT_PATH:
+        try:
+            loaded = await asyncio.to_thread(
+                lifecycle.load_snapshot, envs.SNAPSHOT_PATH, scheduler, execute_plan
+            )
+        except Exception as e:
+            _snapshot_load_failed = True
+            logger.error(
+                f"Error loading snapshot {envs.SNAPSHOT_PATH}, "
+                f"it will not be overwritten on shutdown: {e}"
+            )
+    scheduler.start(paused=lifecycle.tracker.draining)
+
+    # the restored catch-ups are jobs now, so the next restart does not repeat them
+    if loaded:
+        _save_snapshot()
+
+
 async def main():
-    scheduler.start()
+    scheduler_started = asyncio.create_task(start_scheduler())
+
+    # the HTTP server replaces the Python signal handlers while it runs, the
+    # loop is still woken up by the signals, so the change streams end right away
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, _on_shutdown_signal, signum)
 
-    await mcp_server.run_async(transport="http", host=envs.MCP_HOST, port=envs.MCP_PORT)
+    try:
+        await mcp_server.run_async(
+            transport="http", host=envs.MCP_HOST, port=envs.MCP_PORT
+        )
+    finally:
+        await scheduler_started
+        await shutdown()
 
 
 if __name__ == "__main__":
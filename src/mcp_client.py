@@ -1,15 +1,23 @@
 import ast
 import logging
-from typing import Dict, Any
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Any
 
 import mcp
 
-from fastmcp.client import Client
-from fastmcp.client.transports import StdioTransport
+import plan_storage
+import tracing
+
+if TYPE_CHECKING:
+    from fastmcp.client import Client
 
 
 logger = logging.getLogger(__name__)
 
+# health of the called endpoints, kept across restarts in the runtime snapshot
+endpoint_health: Dict[str, Dict[str, Any]] = {}
+
 
 async def call_tool(
     mcp_endpoint: str, mcp_tool_name: str, mcp_tool_args: Dict[str, Any]
@@ -25,27 +33,51 @@ async def call_tool(
     mcp_tool_args: arguments to pass to the tool
     """
     logger.info(
-        f"Calling tool {mcp_tool_name} at {mcp_endpoint} with args: {mcp_tool_args}"
+        f"Calling tool {mcp_tool_name} at {mcp_endpoint} with args: {plan_storage.abbreviate(mcp_tool_args)}"
     )
 
-    # Check if it's a process-based MCP server
-    if mcp_endpoint.startswith("command:"):
-        return await _call_process_mcp(mcp_endpoint, mcp_tool_name, mcp_tool_args)
+    started = time.perf_counter()
+    try:
+        # Check if it's a process-based MCP server
+        if mcp_endpoint.startswith("command:"):
+            result = await _call_process_mcp(mcp_endpoint, mcp_tool_name, mcp_tool_args)
+        else:
+            # HTTP-based MCP server
+            result = await _call_http_mcp(mcp_endpoint, mcp_tool_name, mcp_tool_args)
+    except Exception as e:
+        _record_health(mcp_endpoint, time.perf_counter() - started, error=e)
+        raise
+
+    _record_health(mcp_endpoint, time.perf_counter() - started)
+    return result
+
+
+def _record_health(mcp_endpoint: str, latency: float, error: Exception = None):
+    health = endpoint_health.setdefault(
+        mcp_endpoint,
+        {"successes": 0, "failures": 0, "consecutive_failures": 0, "last_error": None},
+    )
+    health["last_latency"] = latency
+    health["last_called_at"] = datetime.now(timezone.utc)
+    if error is None:
+        health["successes"] += 1
+        health["consecutive_failures"] = 0
     else:
-        # HTTP-based MCP server
-        return await _call_http_mcp(mcp_endpoint, mcp_tool_name, mcp_tool_args)
+        health["failures"] += 1
+        health["consecutive_failures"] += 1
+        health["last_error"] = str(error)
 
 
 async def _call_http_mcp(
     mcp_endpoint: str, mcp_tool_name: str, mcp_tool_args: Dict[str, Any]
 ) -> mcp.types.CallToolResult:
     """Call HTTP-based MCP server."""
+    # the client and its transports are loaded on the first call to keep the start fast
+    from fastmcp.client import Client
+
     client = Client(f"{mcp_endpoint}")
 
-    async with client:
-        result = await client.call_tool_mcp(mcp_tool_name, mcp_tool_args)
-        logger.info(f"Tool {mcp_tool_name} called with result: {result}")
-        return result
+    return await _call_with_client(client, "http", mcp_tool_name, mcp_tool_args)
 
 
 def _parse_process_endpoint(mcp_endpoint: str) -> tuple[str, list[str]]:
@@ -73,14 +105,49 @@ async def _call_process_mcp(
     mcp_endpoint: str, mcp_tool_name: str, mcp_tool_args: Dict[str, Any]
 ) -> mcp.types.CallToolResult:
     """Call process-based MCP server."""
-    command, args = _parse_process_endpoint(mcp_endpoint)
+    with tracing.span("mcp.endpoint_parse"):
+        command, args = _parse_process_endpoint(mcp_endpoint)
 
     logger.info(f"Executing process command: {command} with args: {args}")
 
+    from fastmcp.client import Client
+    from fastmcp.client.transports import StdioTransport
+
     transport = StdioTransport(command=command, args=args)
     client = Client(transport)
 
-    async with client:
-        result = await client.call_tool_mcp(mcp_tool_name, mcp_tool_args)
-        logger.info(f"Tool {mcp_tool_name} called with result: {result}")
-        return result
+    return await _call_with_client(client, "stdio", mcp_tool_name, mcp_tool_args)
+
+
+async def _call_with_client(
+    client: "Client",
+    transport: str,
+    mcp_tool_name: str,
+    mcp_tool_args: Dict[str, Any],
+) -> mcp.types.CallToolResult:
+    """Call the tool, tracing connection, the call itself and the teardown.
+
+    Entering the client spawns the process or opens the HTTP session
+    and performs the MCP initialize handshake, both are in `mcp.connect`.
+    """
+    with tracing.span(
+        "mcp.connect",
+        attributes={"mcp.transport": transport, "mcp.initialize": True},
+    ):
+        await client.__aenter__()
+
+    try:
+        with tracing.span("mcp.tool_call", attributes={"mcp.tool": mcp_tool_name}):
+            result = await client.call_tool_mcp(mcp_tool_name, mcp_tool_args)
+    except BaseException as e:
+        with tracing.span("mcp.teardown"):
+            await client.__aexit__(type(e), e, e.__traceback__)
+        raise
+
+    with tracing.span("mcp.teardown"):
+        await client.__aexit__(None, None, None)
+
+    logger.info(
+        f"Tool {mcp_tool_name} called with result: {plan_storage.abbreviate(result)}"
+    )
+    return result
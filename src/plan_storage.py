@@ -0,0 +1,63 @@
+import reprlib
+import zlib
+from typing import Any
+
+import envs
+
+
+class CompressedPlan:
+    """Execution plan kept zlib-compressed in the job arguments.
+
+    Decompressed only when the job fires or is listed in detail.
+    """
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, plan: str):
+        raw = plan.encode()
+        self.data = zlib.compress(raw, envs.PLAN_COMPRESSION_LEVEL)
+        self.size = len(raw)
+
+    def decompress(self) -> str:
+        return zlib.decompress(self.data).decode()
+
+    def __repr__(self):
+        return f"<compressed plan of {self.size} bytes>"
+
+
+def pack(plan: str) -> str | CompressedPlan:
+    """Compress the plan if it is above the size threshold and it pays off."""
+    if len(plan) < envs.PLAN_COMPRESSION_THRESHOLD:
+        return plan
+
+    compressed = CompressedPlan(plan)
+    if len(compressed.data) >= compressed.size:
+        return plan
+    return compressed
+
+
+def unpack(plan: str | CompressedPlan) -> str:
+    if isinstance(plan, CompressedPlan):
+        return plan.decompress()
+    return plan
+
+
+def plan_size(plan: str | CompressedPlan) -> int:
+    """Size of the plan in bytes, without decompressing it."""
+    if isinstance(plan, CompressedPlan):
+        return plan.size
+    return len(plan.encode())
+
+
+# keeps large plans and tool arguments from being copied into every log line
+_log_repr = reprlib.Repr()
+_log_repr.maxstring = 200
+_log_repr.maxother = 200
+_log_repr.maxdict = 20
+_log_repr.maxlist = 20
+_log_repr.maxlevel = 3
+
+
+def abbreviate(value: Any) -> str:
+    """Shortened representation of the value for logging."""
+    return _log_repr.repr(value)
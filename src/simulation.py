@@ -0,0 +1,418 @@
+"""Deterministic scheduler load simulation on a virtual clock.
+
+Jobs are created with the real scheduling tools and fired by a real
+`AsyncIOScheduler`, whose notion of now follows the virtual clock, while
+`mcp_client.call_tool` is replaced with stub endpoints that have configurable
+latency and failure rate. Time advances as fast as the CPU allows.
+
+Run with:
+    uv run src/simulation.py --jobs 1000 --days 30 --max-concurrency 50
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import random
+import selectors
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from unittest import mock
+
+import apscheduler.executors.base
+import apscheduler.job
+import apscheduler.schedulers.base
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from fastmcp import Client
+
+import envs
+import job_events
+import main
+import mcp_client
+import tracing
+
+DEFAULT_ENDPOINT = "http://simulated-mcp/mcp/"
+
+RUN_EVENTS_MASK = (
+    EVENT_JOB_SUBMITTED
+    | EVENT_JOB_MAX_INSTANCES
+    | EVENT_JOB_EXECUTED
+    | EVENT_JOB_ERROR
+    | EVENT_JOB_MISSED
+)
+
+
+class SimulatedFailure(Exception):
+    pass
+
+
+class _VirtualClockSelector(selectors.DefaultSelector):
+    """Selector that jumps the clock to the next timer instead of waiting for it."""
+
+    def __init__(self):
+        super().__init__()
+        self.time = 0.0
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # nothing is scheduled, only I/O can wake the loop up
+            return super().select(timeout)
+
+        events = super().select(0)
+        if not events and timeout > 0:
+            self.time += timeout
+        return events
+
+
+class VirtualClockEventLoop(asyncio.SelectorEventLoop):
+    """Event loop where `asyncio.sleep` and all timers run on virtual time."""
+
+    def __init__(self):
+        self._virtual_clock = _VirtualClockSelector()
+        super().__init__(self._virtual_clock)
+
+    def time(self) -> float:
+        return self._virtual_clock.time
+
+
+class EndpointProfile:
+    """Latency and failure distribution of a stubbed MCP endpoint.
+
+    Latency is log-normally distributed around `latency` seconds,
+    `jitter` is the sigma of the distribution (0 means constant latency).
+    """
+
+    def __init__(self, latency: float = 0.1, jitter: float = 0.0, failure_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.jitter == 0 or self.latency == 0:
+            return self.latency
+        # keep the mean of the distribution equal to `latency`
+        mu = math.log(self.latency) - self.jitter**2 / 2
+        return rng.lognormvariate(mu, self.jitter)
+
+
+class _Stats:
+    def __init__(self):
+        self.fires = 0
+        self.executed = 0
+        self.failed = 0
+        self.skipped_max_instances = 0
+        self.misfired = 0
+        self.fire_lags = []
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+class Simulation:
+    """Fires the jobs through the scheduler, its executor and its listeners.
+
+    Fire lag and queue depth come from the `max_concurrency` execution slots,
+    the virtual clock does not model CPU time, so without the limit they are 0.
+    """
+
+    def __init__(
+        self,
+        *,
+        jobs: int,
+        duration: timedelta,
+        seed: int = 0,
+        endpoints: dict[str, EndpointProfile] | None = None,
+        actions_per_plan: int = 1,
+        max_concurrency: int | None = None,
+        start: datetime = datetime(2025, 1, 1, tzinfo=timezone.utc),
+    ):
+        self.jobs = jobs
+        self.duration = duration
+        self.endpoints = endpoints or {DEFAULT_ENDPOINT: EndpointProfile()}
+        self.actions_per_plan = actions_per_plan
+        self.max_concurrency = max_concurrency
+        self.start = start
+        self.end = start + duration
+
+        self._rng = random.Random(seed)
+        self._stats = _Stats()
+        self._semaphore = None
+        self._loop = None
+        self._loop_start = None
+        self._pending_runs = 0
+        self._settled = None
+        self._execute_plan = main.execute_plan
+
+    def now(self) -> datetime:
+        """Virtual time, stays at `start` until the jobs are created."""
+        if self._loop_start is None:
+            return self.start
+        return self.start + timedelta(seconds=self._loop.time() - self._loop_start)
+
+    async def run(self) -> dict[str, Any]:
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = (
+            asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        )
+        self._settled = asyncio.Event()
+
+        scheduler = AsyncIOScheduler(
+            timezone=timezone.utc, executors={"default": tracing.JobRunExecutor()}
+        )
+        feed = job_events.JobEventFeed(envs.JOB_EVENTS_BUFFER_SIZE)
+        feed.attach(scheduler)
+        scheduler.add_listener(self._on_scheduler_event, RUN_EVENTS_MASK)
+
+        with contextlib.ExitStack() as patches:
+            # the scheduler and the executor take the time from `datetime.now`
+            virtual_datetime = self._virtual_datetime()
+            for module in (apscheduler.schedulers.base, apscheduler.executors.base):
+                patches.enter_context(
+                    mock.patch.object(module, "datetime", virtual_datetime)
+                )
+            # jobs due at the same time are fired in the order of their ids
+            patches.enter_context(
+                mock.patch.object(apscheduler.job, "uuid4", self._job_uuid)
+            )
+            patches.enter_context(mock.patch.object(main, "scheduler", scheduler))
+            # the tools schedule the `execute_plan` of the module
+            patches.enter_context(
+                mock.patch.object(main, "execute_plan", self._run_plan)
+            )
+            patches.enter_context(
+                mock.patch.object(mcp_client, "call_tool", self._call_tool)
+            )
+
+            # started paused, so no job fires while the jobs are created
+            scheduler.start(paused=True)
+            try:
+                await self._create_jobs()
+
+                wall_start = time.perf_counter()
+                self._loop_start = self._loop.time()
+                scheduler.resume()
+                await asyncio.sleep(self.duration.total_seconds())
+                scheduler.pause()
+                await self._wait_for_runs()
+                wall_seconds = time.perf_counter() - wall_start
+            finally:
+                scheduler.shutdown(wait=False)
+
+        report = self._report(wall_seconds)
+        report["job_events"] = feed.last_seq
+        return report
+
+    def _virtual_datetime(self) -> type[datetime]:
+        simulation = self
+
+        class VirtualDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                now = simulation.now()
+                if tz is None:
+                    return now.astimezone().replace(tzinfo=None)
+                return now.astimezone(tz)
+
+        return VirtualDatetime
+
+    def _job_uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self._rng.getrandbits(128), version=4)
+
+    def _random_plan(self) -> str:
+        endpoints = list(self.endpoints)
+        plan = {
+            f"action_{i}": {
+                "mcp-service-endpoint": self._rng.choice(endpoints),
+                "mcp-tool-name": "simulated_tool",
+                "mcp-tool-arguments": {"n": i},
+            }
+            for i in range(self.actions_per_plan)
+        }
+        return json.dumps(plan)
+
+    async def _create_jobs(self):
+        """Schedule the jobs through the MCP tools, half by interval and half by cron."""
+        start_date = self.start.strftime("%Y-%m-%d")
+
+        async with Client(main.mcp_server) as client:
+            for i in range(self.jobs):
+                arguments = {
+                    "user_id": f"user_{i % 10}",
+                    "execution_plan": self._random_plan(),
+                    "description": f"simulated job {i}",
+                    "start_date": start_date,
+                    "timezone": "UTC",
+                }
+                if i % 2 == 0:
+                    tool = "schedule_tool_call_at_interval"
+                    arguments["seconds"] = self._rng.choice([30, 60, 300, 900, 3600])
+                else:
+                    tool = "schedule_tool_call_by_cron"
+                    arguments["minute"] = f"*/{self._rng.choice([1, 5, 15, 30])}"
+
+                result = await client.call_tool(tool, arguments=arguments)
+                if result.content[0].text.startswith("Error"):
+                    raise RuntimeError(result.content[0].text)
+
+    async def _call_tool(self, mcp_endpoint, mcp_tool_name, mcp_tool_args):
+        profile = self.endpoints.get(mcp_endpoint, EndpointProfile())
+        await asyncio.sleep(profile.sample_latency(self._rng))
+        if self._rng.random() < profile.failure_rate:
+            raise SimulatedFailure(f"Simulated failure of {mcp_tool_name}")
+
+    def _on_scheduler_event(self, event):
+        stats = self._stats
+        if event.code == EVENT_JOB_SUBMITTED:
+            stats.fires += len(event.scheduled_run_times)
+            self._pending_runs += len(event.scheduled_run_times)
+            return
+        if event.code == EVENT_JOB_MAX_INSTANCES:
+            stats.fires += len(event.scheduled_run_times)
+            stats.skipped_max_instances += len(event.scheduled_run_times)
+            return
+
+        if event.code == EVENT_JOB_EXECUTED:
+            stats.executed += 1
+        elif event.code == EVENT_JOB_ERROR:
+            stats.failed += 1
+        elif event.code == EVENT_JOB_MISSED:
+            stats.misfired += 1
+
+        self._pending_runs -= 1
+        if self._pending_runs == 0:
+            self._settled.set()
+
+    async def _wait_for_runs(self):
+        while self._pending_runs:
+            self._settled.clear()
+            await self._settled.wait()
+
+    async def _run_plan(self, *args, **kwargs):
+        """`execute_plan` run by the scheduler, waits for a free execution slot."""
+        stats = self._stats
+        job_run = tracing.current_job_run.get()
+        if self._semaphore is not None:
+            await self._acquire_slot()
+
+        try:
+            lag = self.now() - job_run.scheduled_run_time
+            stats.fire_lags.append(lag.total_seconds())
+
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                await self._execute_plan(*args, **kwargs)
+            finally:
+                stats.in_flight -= 1
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    async def _acquire_slot(self):
+        """Wait for a free execution slot, counting the jobs queued for it."""
+        stats = self._stats
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+
+        stats.queue_depth += 1
+        stats.max_queue_depth = max(stats.max_queue_depth, stats.queue_depth)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            stats.queue_depth -= 1
+
+    def _report(self, wall_seconds: float) -> dict[str, Any]:
+        stats = self._stats
+        lags = sorted(stats.fire_lags)
+        virtual_seconds = self.duration.total_seconds()
+        return {
+            "jobs": self.jobs,
+            "virtual_seconds": virtual_seconds,
+            "wall_seconds": wall_seconds,
+            "fires": stats.fires,
+            "executed": stats.executed,
+            "failed": stats.failed,
+            "skipped_max_instances": stats.skipped_max_instances,
+            "misfired": stats.misfired,
+            "fire_lag": {
+                "p50": _percentile(lags, 50),
+                "p95": _percentile(lags, 95),
+                "p99": _percentile(lags, 99),
+                "max": lags[-1] if lags else 0.0,
+            },
+            "max_queue_depth": stats.max_queue_depth,
+            "max_in_flight": stats.max_in_flight,
+            "throughput": {
+                "fires_per_wall_second": stats.fires / wall_seconds
+                if wall_seconds
+                else 0.0,
+                "fires_per_virtual_second": stats.fires / virtual_seconds,
+            },
+        }
+
+
+def simulate(**kwargs) -> dict[str, Any]:
+    """Run `Simulation` with the given parameters in a virtual clock event loop."""
+    # per execution logs, including the simulated failures, would dominate the run time
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.ERROR)
+
+    loop = VirtualClockEventLoop()
+    try:
+        return loop.run_until_complete(Simulation(**kwargs).run())
+    finally:
+        loop.close()
+        logging.disable(previous_disable)
+
+
+def _parse_endpoints(value: str) -> dict[str, EndpointProfile]:
+    return {
+        endpoint: EndpointProfile(**profile)
+        for endpoint, profile in json.loads(value).items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--actions-per-plan", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument(
+        "--endpoints",
+        type=_parse_endpoints,
+        default=None,
+        help='JSON, e.g. {"http://a/mcp/": {"latency": 0.2, "jitter": 0.5, "failure_rate": 0.01}}',
+    )
+    cli_args = parser.parse_args()
+
+    report = simulate(
+        jobs=cli_args.jobs,
+        duration=timedelta(days=cli_args.days),
+        seed=cli_args.seed,
+        endpoints=cli_args.endpoints,
+        actions_per_plan=cli_args.actions_per_plan,
+        max_concurrency=cli_args.max_concurrency,
+    )
+    print(json.dumps(report, indent=4))
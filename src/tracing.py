@@ -0,0 +1,276 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from apscheduler.executors.asyncio import AsyncIOExecutor
+
+import envs
+
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "apscheduler-mcp-server"
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# information about the scheduler run that triggered the current execution,
+# set by `JobRunExecutor` and inherited by the task running the job
+current_job_run = contextvars.ContextVar("current_job_run", default=None)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# marks that the current trace was dropped by sampling, so child spans are no-ops
+_UNSAMPLED = object()
+
+_exporter = None
+
+
+class JobRun:
+    """Scheduler side information about a single job fire."""
+
+    __slots__ = ("job_id", "scheduled_run_time", "submitted_ns")
+
+    def __init__(self, job_id: str, scheduled_run_time, submitted_ns: int):
+        self.job_id = job_id
+        self.scheduled_run_time = scheduled_run_time
+        self.submitted_ns = submitted_ns
+
+
+class JobRunExecutor(AsyncIOExecutor):
+    """AsyncIO executor that exposes the fired job via `current_job_run`.
+
+    The task running the job copies the context at creation time,
+    so the job function can read which job and which run time it serves.
+    """
+
+    def _do_submit_job(self, job, run_times):
+        token = current_job_run.set(JobRun(job.id, run_times[0], time.time_ns()))
+        try:
+            return super()._do_submit_job(job, run_times)
+        finally:
+            current_job_run.reset(token)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _UnsampledSpan(_NoopSpan):
+    """Root span dropped by sampling, suppresses all its children."""
+
+    def __enter__(self):
+        self._token = _current_span.set(_UNSAMPLED)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans = []
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace",
+        "span_id",
+        "parent_span_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "status_code",
+        "status_message",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace: _Trace,
+        parent_span_id: str,
+        attributes: dict[str, Any],
+        start_ns: int,
+    ):
+        self.name = name
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.start_ns = start_ns
+        self.end_ns = None
+        self.status_code = STATUS_OK
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.status_code = STATUS_ERROR
+            self.status_message = f"{exc_type.__name__}: {exc}"
+        self.end(time.time_ns())
+        return False
+
+    def end(self, end_ns: int):
+        self.end_ns = end_ns
+        self.trace.spans.append(self)
+        # the root span is the last to end, so the whole trace is complete
+        if not self.parent_span_id:
+            _export(self.trace)
+
+
+def span(
+    name: str,
+    attributes: dict[str, Any] | None = None,
+    start_ns: int | None = None,
+):
+    """Start a span as a child of the current one, or a new sampled trace.
+
+    Returns a context manager. When tracing is disabled, or the trace was
+    not sampled, a shared no-op span is returned.
+    """
+    if not envs.TRACING_ENABLED:
+        return NOOP_SPAN
+
+    parent = _current_span.get()
+    if parent is _UNSAMPLED:
+        return NOOP_SPAN
+
+    if parent is None:
+        if random.random() >= envs.TRACING_SAMPLE_RATIO:
+            return _UnsampledSpan()
+        trace, parent_span_id = _Trace(), ""
+    else:
+        trace, parent_span_id = parent.trace, parent.span_id
+
+    return Span(
+        name,
+        trace,
+        parent_span_id,
+        dict(attributes or {}),
+        start_ns if start_ns is not None else time.time_ns(),
+    )
+
+
+def record_span(
+    name: str,
+    start_ns: int,
+    end_ns: int,
+    attributes: dict[str, Any] | None = None,
+):
+    """Record an already finished child span of the current span."""
+    parent = _current_span.get()
+    if not envs.TRACING_ENABLED or parent is None or parent is _UNSAMPLED:
+        return
+
+    Span(name, parent.trace, parent.span_id, dict(attributes or {}), start_ns).end(
+        end_ns
+    )
+
+
+def _encode_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _encode_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _encode_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def to_otlp_json(trace: _Trace) -> dict[str, Any]:
+    """Convert finished trace into the OTLP/JSON `ExportTraceServiceRequest`."""
+    spans = []
+    for s in trace.spans:
+        encoded = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _encode_attributes(s.attributes),
+            "status": {"code": s.status_code},
+        }
+        if s.parent_span_id:
+            encoded["parentSpanId"] = s.parent_span_id
+        if s.status_message:
+            encoded["status"]["message"] = s.status_message
+        spans.append(encoded)
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _encode_attributes({"service.name": SERVICE_NAME})
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def _get_exporter() -> logging.Logger:
+    """Exporter writes one OTLP/JSON request per line into rotating files."""
+    global _exporter
+    if _exporter is None:
+        path = Path(envs.TRACING_EXPORT_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=envs.TRACING_EXPORT_MAX_BYTES,
+            backupCount=envs.TRACING_EXPORT_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+        # standalone logger, so spans never reach the application log handlers
+        exporter = logging.Logger(f"{__name__}.otlp", logging.INFO)
+        exporter.addHandler(handler)
+        _exporter = exporter
+    return _exporter
+
+
+def _export(trace: _Trace):
+    try:
+        _get_exporter().info(json.dumps(to_otlp_json(trace), separators=(",", ":")))
+    except Exception as e:
+        # tracing must never break the job execution
+        logger.error(f"Error exporting trace {trace.trace_id}: {e}")
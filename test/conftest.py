@@ -1,7 +1,20 @@
 import sys
+from datetime import timezone
 from pathlib import Path
 
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
 # Add the src directory to the Python path for imports during testing
 src_path = Path(__file__).parent.parent / "src"
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
+
+
+@pytest.fixture
+async def scheduler():
+    """Started paused, so the added jobs get their next run times but never fire."""
+    scheduler = AsyncIOScheduler(timezone=timezone.utc)
+    scheduler.start(paused=True)
+    yield scheduler
+    scheduler.shutdown(wait=False)
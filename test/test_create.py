@@ -4,9 +4,17 @@ import pytest
 from fastmcp import Client
 from unittest.mock import ANY
 
+from plan_storage import CompressedPlan, pack
 from src.main import mcp_server, validate_plan, execute_plan
 
 
+LARGE_PLAN = (
+    '{"action_1": {"mcp-service-endpoint": "http://localhost:8000", "mcp-tool-name": "send_email", "mcp-tool-arguments": {"message": "'
+    + "Welcome to Pizza Friday! " * 1000
+    + '"}}}'
+)
+
+
 class TestCreate:
     async def test_schedule_once_at_date(self, mocker):
         add_job_mock = mocker.patch(
@@ -123,6 +131,28 @@ class TestCreate:
                 kwargs={"user_id": "user_123", "description": ANY},
             )
 
+    async def test_schedule_large_plan_is_compressed(self, mocker):
+        add_job_mock = mocker.patch(
+            "src.main.scheduler.add_job", return_value=mocker.Mock(id="job_123")
+        )
+
+        async with Client(mcp_server) as client:
+            result = await client.call_tool(
+                "schedule_tool_call_once_at_date",
+                arguments={
+                    "user_id": "user_123",
+                    "execution_plan": LARGE_PLAN,
+                    "run_date": "2025-01-01 12:00:00",
+                },
+            )
+
+            assert result.content[0].text == "job_123"
+
+            [stored_plan] = add_job_mock.call_args.kwargs["args"]
+            assert isinstance(stored_plan, CompressedPlan)
+            assert len(stored_plan.data) < len(LARGE_PLAN) / 10
+            assert stored_plan.decompress() == LARGE_PLAN
+
 
 class TestValidatePlan:
     def test_validate_plan_valid(self):
@@ -233,3 +263,16 @@ class TestExecutePlan:
             "mcp_reddit_get_frontpage_posts",
             {"limit": 5},
         )
+
+    async def test_execute_plan_compressed(self, mocker):
+        execute_plan_mock = mocker.patch("mcp_client.call_tool")
+
+        await execute_plan(
+            pack(LARGE_PLAN), user_id="user_123", description="test_description"
+        )
+
+        execute_plan_mock.assert_called_once_with(
+            "http://localhost:8000",
+            "send_email",
+            {"message": "Welcome to Pizza Friday! " * 1000},
+        )
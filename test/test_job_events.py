@@ -0,0 +1,248 @@
+import asyncio
+import json
+from datetime import timezone
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from fastmcp import Client
+from starlette.testclient import TestClient
+
+import job_events
+import lifecycle
+import tracing
+from src.main import execute_plan, mcp_server
+
+
+async def noop_job(plan, *, user_id, description):
+    pass
+
+
+@pytest.fixture
+def feed(mocker, scheduler):
+    feed = job_events.JobEventFeed(size=5)
+    feed.attach(scheduler)
+    mocker.patch("job_events.feed", feed)
+    return feed
+
+
+def add_job(scheduler, user_id):
+    return scheduler.add_job(
+        noop_job,
+        "interval",
+        hours=1,
+        args=["plan"],
+        kwargs={"user_id": user_id, "description": f"job of {user_id}"},
+    )
+
+
+class TestJobEventFeed:
+    async def test_changes_of_user(self, feed, scheduler):
+        job = add_job(scheduler, "user_123")
+        add_job(scheduler, "user_456")
+        scheduler.remove_job(job.id)
+
+        changes, reset = feed.since(0, "user_123")
+
+        assert not reset
+        assert [(c["seq"], c["event"], c["job_id"]) for c in changes] == [
+            (1, "added", job.id),
+            (3, "removed", job.id),
+        ]
+        assert changes[0]["description"] == "job of user_123"
+        assert feed.since(1, "user_123")[0] == changes[1:]
+
+    async def test_reset_when_buffer_is_overrun(self, feed, scheduler):
+        for _ in range(7):
+            add_job(scheduler, "user_123")
+
+        changes, reset = feed.since(1, "user_123")
+
+        assert reset
+        assert [c["seq"] for c in changes] == [3, 4, 5, 6, 7]
+        assert feed.since(2, "user_123")[1] is False
+
+    async def test_reset_after_restart(self, feed, scheduler):
+        job = add_job(scheduler, "user_123")
+
+        # sequence numbered by the process before the restart
+        changes, reset = feed.since(500, "user_123")
+        assert reset
+        assert [c["job_id"] for c in changes] == [job.id]
+
+        changes, reset = feed.since(0, "user_123", epoch="0ld3p0ch")
+        assert reset
+        assert [c["job_id"] for c in changes] == [job.id]
+
+        assert feed.since(1, "user_123", epoch=feed.epoch) == ([], False)
+
+    async def test_stream_resumes_after_restart(self, feed, scheduler):
+        job = add_job(scheduler, "user_123")
+        stream = feed.stream("user_123", 500, "0ld3p0ch")
+
+        reset = await anext(stream)
+        assert reset.startswith("event: reset\n")
+        assert json.loads(reset.split("data: ")[1]) == {
+            "epoch": feed.epoch,
+            "last_seq": 1,
+        }
+        change = await anext(stream)
+        assert json.loads(change.split("data: ")[1])["job_id"] == job.id
+
+        await stream.aclose()
+
+    async def test_run_deferred_by_drain(self, mocker, feed):
+        call_tool_mock = mocker.patch("mcp_client.call_tool")
+        tracker = lifecycle.ExecutionTracker()
+        tracker.draining = True
+        mocker.patch("lifecycle.tracker", tracker)
+        scheduler = AsyncIOScheduler(
+            timezone=timezone.utc, executors={"default": tracing.JobRunExecutor()}
+        )
+        feed.attach(scheduler)
+        scheduler.start()
+        try:
+            scheduler.add_job(
+                execute_plan,
+                args=["plan"],
+                kwargs={"user_id": "user_123", "description": "test"},
+            )
+            await asyncio.sleep(0.1)
+        finally:
+            scheduler.shutdown(wait=False)
+
+        changes, _ = feed.since(0, "user_123")
+        assert [c["event"] for c in changes] == [
+            "added",
+            "removed",
+            "fired",
+            "deferred",
+        ]
+        call_tool_mock.assert_not_called()
+
+    async def test_stream_ends_when_closed(self, feed, scheduler):
+        stream = feed.stream("user_123", 0)
+        next_change = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0)
+
+        feed.close()
+
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(next_change, 1)
+
+    def test_parse_event_id(self):
+        assert job_events.parse_event_id("0ld3p0ch-12") == ("0ld3p0ch", 12)
+        assert job_events.parse_event_id("12") == (None, 12)
+
+    async def test_stream(self, feed, scheduler):
+        job = add_job(scheduler, "user_123")
+        stream = feed.stream("user_123", 0)
+
+        first = await anext(stream)
+        assert first.startswith(f"id: {feed.epoch}-1\nevent: added\ndata: ")
+        assert json.loads(first.split("data: ")[1])["job_id"] == job.id
+
+        next_change = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0)
+        assert not next_change.done()
+
+        scheduler.remove_job(job.id)
+        second = await asyncio.wait_for(next_change, 1)
+        assert second.startswith(f"id: {feed.epoch}-2\nevent: removed\n")
+
+        await stream.aclose()
+
+
+class TestGetJobChanges:
+    async def test_get_job_changes(self, feed, scheduler):
+        first_job = add_job(scheduler, "user_123")
+        second_job = add_job(scheduler, "user_123")
+        add_job(scheduler, "user_456")
+
+        async with Client(mcp_server) as client:
+            result = await client.call_tool(
+                "get_job_changes",
+                arguments={"user_id": "user_123", "limit": 1},
+            )
+            page = json.loads(result.content[0].text)
+            assert [c["job_id"] for c in page["changes"]] == [first_job.id]
+            assert page["last_seq"] == 1
+            assert page["epoch"] == feed.epoch
+            assert page["reset"] is False
+
+            result = await client.call_tool(
+                "get_job_changes",
+                arguments={
+                    "user_id": "user_123",
+                    "since_seq": page["last_seq"],
+                    "epoch": page["epoch"],
+                },
+            )
+            page = json.loads(result.content[0].text)
+            assert [c["job_id"] for c in page["changes"]] == [second_job.id]
+            assert page["last_seq"] == 3
+
+            result = await client.call_tool(
+                "get_job_changes",
+                arguments={"user_id": "user_123", "since_seq": 3, "epoch": "0ld3p0ch"},
+            )
+            page = json.loads(result.content[0].text)
+            assert len(page["changes"]) == 2
+            assert page["reset"] is True
+
+    async def test_invalid_limit(self, feed, scheduler):
+        add_job(scheduler, "user_123")
+
+        async with Client(mcp_server) as client:
+            result = await client.call_tool(
+                "get_job_changes",
+                arguments={"user_id": "user_123", "limit": 0},
+            )
+
+        assert result.content[0].text == (
+            "Error getting job changes: limit must be at least 1, got 0"
+        )
+
+
+@pytest.fixture
+def http_client():
+    return TestClient(mcp_server.http_app())
+
+
+class TestStreamJobChangesRoute:
+    def test_user_id_is_required(self, http_client):
+        response = http_client.get("/jobs/changes")
+
+        assert response.status_code == 400
+
+    def test_since_seq_must_be_integer(self, http_client):
+        response = http_client.get(
+            "/jobs/changes", params={"user_id": "user_123", "since_seq": "abc"}
+        )
+
+        assert response.status_code == 400
+
+    async def test_resume_from_last_event_id(
+        self, mocker, feed, scheduler, http_client
+    ):
+        add_job(scheduler, "user_123")
+        second_job = add_job(scheduler, "user_123")
+        stream = feed.stream
+
+        async def stream_until_first_change(*args):
+            # the test client returns the response only once the stream ends
+            async for chunk in stream(*args):
+                yield chunk
+                feed.close()
+
+        mocker.patch.object(feed, "stream", stream_until_first_change)
+
+        response = http_client.get(
+            "/jobs/changes",
+            params={"user_id": "user_123"},
+            headers={"Last-Event-ID": f"{feed.epoch}-1"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith(f"id: {feed.epoch}-2\nevent: added\n")
+        assert json.loads(response.text.split("data: ")[1])["job_id"] == second_job.id
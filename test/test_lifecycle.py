@@ -0,0 +1,237 @@
+import asyncio
+import pickle
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING
+from fastmcp import Client
+
+import lifecycle
+import mcp_client
+from src.main import execute_plan, mcp_server, shutdown, start_scheduler
+
+PLAN = '{"action_1": {"mcp-service-endpoint": "http://localhost:8000", "mcp-tool-name": "test_tool", "mcp-tool-arguments": {"arg1": "value1"}}}'
+
+
+@pytest.fixture
+def tracker(mocker):
+    tracker = lifecycle.ExecutionTracker()
+    mocker.patch("lifecycle.tracker", tracker)
+    return tracker
+
+
+def slow_call_tool(seconds):
+    async def call_tool(*args):
+        await asyncio.sleep(seconds)
+
+    return call_tool
+
+
+class TestDrain:
+    async def test_drain_waits_for_executions(self, mocker, tracker):
+        mocker.patch("mcp_client.call_tool", slow_call_tool(0.05))
+
+        execution = asyncio.create_task(
+            execute_plan(PLAN, user_id="user_123", description="test")
+        )
+        await asyncio.sleep(0)
+        assert len(tracker.in_flight()) == 1
+
+        await tracker.drain(timeout=5)
+
+        assert execution.done() and not execution.cancelled()
+        assert tracker.in_flight() == []
+        assert tracker.pending_catch_ups == []
+
+    async def test_drain_timeout_cancels_executions(self, mocker, tracker):
+        mocker.patch("mcp_client.call_tool", slow_call_tool(10))
+
+        execution = asyncio.create_task(
+            execute_plan(PLAN, user_id="user_123", description="test")
+        )
+        await asyncio.sleep(0)
+
+        await tracker.drain(timeout=0.01)
+
+        assert execution.cancelled()
+        assert tracker.pending_catch_ups == [
+            {
+                "job_id": None,
+                "plan": PLAN,
+                "user_id": "user_123",
+                "description": "test",
+                "started": True,
+            }
+        ]
+
+    async def test_draining_defers_new_executions(self, mocker, tracker):
+        call_tool_mock = mocker.patch("mcp_client.call_tool")
+        tracker.draining = True
+
+        await execute_plan(PLAN, user_id="user_123", description="test")
+
+        call_tool_mock.assert_not_called()
+        assert tracker.pending_catch_ups[0]["started"] is False
+
+    async def test_resume_cancels_drain(self, mocker, tracker, scheduler):
+        call_tool_mock = mocker.patch("mcp_client.call_tool")
+        mocker.patch("src.main.scheduler", scheduler)
+        scheduler.resume()
+
+        async with Client(mcp_server) as client:
+            await client.call_tool("drain_scheduler")
+            assert tracker.draining
+            assert scheduler.state == STATE_PAUSED
+
+            await execute_plan(PLAN, user_id="user_123", description="test")
+            result = await client.call_tool("resume_scheduler")
+
+        assert (
+            result.content[0].text
+            == "Scheduler resumed, 1 deferred executions scheduled"
+        )
+        assert not tracker.draining
+        assert tracker.pending_catch_ups == []
+        assert scheduler.state == STATE_RUNNING
+
+        await asyncio.sleep(0.1)
+        call_tool_mock.assert_called_once()
+
+
+class TestSnapshot:
+    async def test_snapshot_round_trip(self, mocker, tmp_path, tracker, scheduler):
+        path = str(tmp_path / "snapshot.pkl")
+        job = scheduler.add_job(
+            execute_plan,
+            "interval",
+            hours=1,
+            args=[PLAN],
+            kwargs={"user_id": "user_123", "description": "test"},
+        )
+        tracker.defer("job_456", PLAN, user_id="user_456", description="deferred")
+        mocker.patch.dict(
+            "mcp_client.endpoint_health", {"http://localhost:8000": {"failures": 1}}
+        )
+
+        lifecycle.save_snapshot(path, scheduler)
+        mcp_client.endpoint_health.clear()
+
+        restored_scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        assert lifecycle.load_snapshot(path, restored_scheduler, execute_plan)
+        restored_scheduler.start(paused=True)
+        try:
+            restored_jobs = {job.id: job for job in restored_scheduler.get_jobs()}
+            assert restored_jobs[job.id].next_run_time == job.next_run_time
+            assert restored_jobs[job.id].args == (PLAN,)
+            # deferred execution is added to run as soon as possible
+            assert len(restored_jobs) == 2
+        finally:
+            restored_scheduler.shutdown(wait=False)
+
+        assert mcp_client.endpoint_health == {"http://localhost:8000": {"failures": 1}}
+        # kept until the next save replaces it
+        assert (tmp_path / "snapshot.pkl").exists()
+
+    async def test_missed_fire_is_caught_up(self, mocker, tmp_path, tracker, scheduler):
+        call_tool_mock = mocker.patch("mcp_client.call_tool")
+        path = str(tmp_path / "snapshot.pkl")
+        missed_at = datetime.now(timezone.utc) - timedelta(seconds=30)
+        scheduler.add_job(
+            execute_plan,
+            "interval",
+            hours=1,
+            args=[PLAN],
+            kwargs={"user_id": "user_123", "description": "test"},
+            next_run_time=missed_at,
+        )
+        lifecycle.save_snapshot(path, scheduler)
+
+        restored_scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        lifecycle.load_snapshot(path, restored_scheduler, execute_plan)
+        restored_scheduler.start()
+        try:
+            await asyncio.sleep(0.1)
+
+            call_tool_mock.assert_called_once()
+            [job] = restored_scheduler.get_jobs()
+            # the fire after the catch-up stays on the original schedule
+            assert job.next_run_time == missed_at + timedelta(hours=1)
+            assert job.misfire_grace_time == 1
+        finally:
+            restored_scheduler.shutdown(wait=False)
+
+    @pytest.mark.parametrize("content", [b"not a pickle", pickle.dumps({"version": 2})])
+    async def test_broken_snapshot_is_moved_aside(self, tmp_path, tracker, content):
+        path = tmp_path / "snapshot.pkl"
+        path.write_bytes(content)
+
+        restored_scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        assert not lifecycle.load_snapshot(str(path), restored_scheduler, execute_plan)
+
+        assert not path.exists()
+        assert (tmp_path / "snapshot.pkl.bad").read_bytes() == content
+
+    async def test_restored_catch_ups_are_saved_as_jobs(
+        self, mocker, tmp_path, tracker, scheduler
+    ):
+        mocker.patch("mcp_client.call_tool")
+        path = tmp_path / "snapshot.pkl"
+        tracker.defer("job_456", PLAN, user_id="user_456", description="deferred")
+        lifecycle.save_snapshot(str(path), scheduler)
+        tracker.pending_catch_ups.clear()
+
+        restored_scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        mocker.patch("src.main.scheduler", restored_scheduler)
+        mocker.patch("src.main.envs.SNAPSHOT_PATH", str(path))
+        mocker.patch("src.main._snapshot_load_failed", False)
+        await start_scheduler()
+        try:
+            snapshot = pickle.loads(path.read_bytes())
+            assert snapshot["catch_ups"] == []
+            assert [job["kwargs"]["user_id"] for job in snapshot["jobs"]] == [
+                "user_456"
+            ]
+        finally:
+            restored_scheduler.shutdown(wait=False)
+
+    async def test_shutdown_saves_before_and_after_drain(
+        self, mocker, tmp_path, tracker
+    ):
+        calls = []
+        scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        scheduler.start()
+        mocker.patch("src.main.scheduler", scheduler)
+        mocker.patch("src.main.envs.SNAPSHOT_PATH", str(tmp_path / "snapshot.pkl"))
+        mocker.patch("src.main._snapshot_load_failed", False)
+        mocker.patch(
+            "lifecycle.save_snapshot", side_effect=lambda *args: calls.append("save")
+        )
+        mocker.patch.object(
+            tracker, "drain", side_effect=lambda timeout: calls.append("drain")
+        )
+
+        await shutdown()
+
+        assert calls == ["save", "drain", "save"]
+
+    async def test_interrupted_executions_are_not_resumed(
+        self, mocker, tmp_path, tracker, scheduler
+    ):
+        mocker.patch("src.main.envs.RESUME_INTERRUPTED_EXECUTIONS", False)
+        path = str(tmp_path / "snapshot.pkl")
+        tracker.pending_catch_ups.append(
+            {
+                "job_id": "job_123",
+                "plan": PLAN,
+                "user_id": "user_123",
+                "description": "test",
+                "started": True,
+            }
+        )
+        lifecycle.save_snapshot(path, scheduler)
+
+        restored_scheduler = AsyncIOScheduler(timezone=timezone.utc)
+        lifecycle.load_snapshot(path, restored_scheduler, execute_plan)
+
+        assert restored_scheduler.get_jobs() == []
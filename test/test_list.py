@@ -3,6 +3,7 @@ import pytest
 from datetime import datetime
 import pprint
 
+from plan_storage import pack
 from src.main import mcp_server
 
 
@@ -13,7 +14,7 @@ async def test_list_jobs(mocker):
         return_value=[
             mocker.Mock(
                 id="job_123",
-                args=["arg1", "arg2"],
+                args=("arg1", "arg2"),
                 kwargs={"user_id": "user_123", "description": "test_description"},
                 next_run_time=datetime.strptime(
                     "2023-01-01 12:00:00", "%Y-%m-%d %H:%M:%S"
@@ -40,7 +41,7 @@ async def test_list_jobs(mocker):
     assert result.content[0].text == pprint.pformat(
         {
             "job_123": {
-                "args": ["arg1", "arg2"],
+                "args": ("arg1", "arg2"),
                 "description": "test_description",
                 "next_run_time": datetime.strptime(
                     "2023-01-01 12:00:00", "%Y-%m-%d %H:%M:%S"
@@ -49,3 +50,46 @@ async def test_list_jobs(mocker):
         },
         indent=4,
     )
+
+
+@pytest.mark.asyncio
+async def test_list_jobs_summary(mocker):
+    plan = (
+        '{"action_1": {"mcp-service-endpoint": "http://localhost:8000", "mcp-tool-name": "test_tool", "mcp-tool-arguments": {"message": "%s"}}}'
+        % ("a" * 10000)
+    )
+    compressed_plan = pack(plan)
+    decompress_mock = mocker.spy(type(compressed_plan), "decompress")
+    mocker.patch(
+        "src.main.scheduler.get_jobs",
+        return_value=[
+            mocker.Mock(
+                id="job_123",
+                args=(compressed_plan,),
+                kwargs={"user_id": "user_123", "description": "test_description"},
+                next_run_time=datetime.strptime(
+                    "2023-01-01 12:00:00", "%Y-%m-%d %H:%M:%S"
+                ),
+            ),
+        ],
+    )
+
+    async with Client(mcp_server) as client:
+        result = await client.call_tool(
+            "list_scheduled_jobs",
+            arguments={"user_id": "user_123", "summary": True},
+        )
+
+    decompress_mock.assert_not_called()
+    assert result.content[0].text == pprint.pformat(
+        {
+            "job_123": {
+                "description": "test_description",
+                "plan_size": len(plan),
+                "next_run_time": datetime.strptime(
+                    "2023-01-01 12:00:00", "%Y-%m-%d %H:%M:%S"
+                ),
+            }
+        },
+        indent=4,
+    )
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import tracing
+from simulation import EndpointProfile, VirtualClockEventLoop, simulate
+
+
+ENDPOINT = "http://simulated-mcp/mcp/"
+
+
+def without_wall_time(report):
+    report = dict(report)
+    del report["wall_seconds"]
+    del report["throughput"]["fires_per_wall_second"]
+    return report
+
+
+class TestSimulation:
+    def test_virtual_clock_does_not_wait(self):
+        loop = VirtualClockEventLoop()
+        try:
+            wall_start = time.perf_counter()
+            loop.run_until_complete(asyncio.sleep(3600))
+            assert loop.time() >= 3600
+            assert time.perf_counter() - wall_start < 1
+        finally:
+            loop.close()
+
+    def test_deterministic(self):
+        params = {
+            "jobs": 6,
+            "duration": timedelta(hours=2),
+            "seed": 42,
+            "endpoints": {ENDPOINT: EndpointProfile(0.5, jitter=1.0, failure_rate=0.1)},
+        }
+
+        first = simulate(**params)
+        second = simulate(**params)
+
+        assert first["fires"] > 0
+        assert without_wall_time(first) == without_wall_time(second)
+
+    def test_jobs_fire_through_scheduler(self, mocker):
+        submit_spy = mocker.spy(tracing.JobRunExecutor, "_do_submit_job")
+
+        report = simulate(jobs=2, duration=timedelta(hours=1))
+
+        assert report["fires"] > 0
+        assert submit_spy.call_count == report["fires"]
+        assert report["executed"] == report["fires"]
+        # fired, completed and added events of the change feed
+        assert report["job_events"] == 2 * report["fires"] + 2
+        # no execution slots to wait for
+        assert report["fire_lag"]["max"] == 0
+        assert report["max_queue_depth"] == 0
+
+    def test_failures(self):
+        report = simulate(
+            jobs=2,
+            duration=timedelta(hours=1),
+            endpoints={ENDPOINT: EndpointProfile(failure_rate=1.0)},
+        )
+
+        assert report["executed"] == 0
+        assert report["failed"] == report["fires"]
+
+    def test_overload_shows_lag_and_queue(self):
+        report = simulate(
+            jobs=10,
+            duration=timedelta(hours=1),
+            endpoints={ENDPOINT: EndpointProfile(latency=20)},
+            max_concurrency=1,
+        )
+
+        assert report["max_in_flight"] == 1
+        assert report["max_queue_depth"] > 0
+        assert report["fire_lag"]["max"] > 0
+        # jobs still waiting for the slot when they fire again
+        assert report["skipped_max_instances"] > 0
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+from datetime import timezone
+from pathlib import Path
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.schedulers.base import STATE_PAUSED
+from fastmcp import Client
+
+import lifecycle
+from src.main import execute_plan, mcp_server, shutdown, start_scheduler
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_import_main_does_not_load_clients():
+    """MCP client transports and the simulation are loaded only when needed."""
+    script = (
+        "import sys, main; "
+        "print(sorted(m for m in ('fastmcp.client', 'fastmcp.client.transports', 'simulation') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        env={"PYTHONPATH": str(ROOT / "src")},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert output.strip() == "[]"
+
+
+async def test_tools_before_scheduler_start(mocker):
+    """The HTTP server serves requests while the snapshot loads, before the start."""
+    scheduler = AsyncIOScheduler(timezone=timezone.utc)
+    mocker.patch("src.main.scheduler", scheduler)
+    mocker.patch("lifecycle.tracker", lifecycle.ExecutionTracker())
+    scheduler.add_job(
+        execute_plan,
+        "interval",
+        hours=1,
+        id="job_123",
+        args=["plan"],
+        kwargs={"user_id": "user_123", "description": "test"},
+    )
+
+    async with Client(mcp_server) as client:
+        for summary in (False, True):
+            result = await client.call_tool(
+                "list_scheduled_jobs",
+                arguments={"user_id": "user_123", "summary": summary},
+            )
+            assert "'next_run_time': None" in result.content[0].text
+
+        result = await client.call_tool("drain_scheduler")
+        assert result.content[0].text == "Scheduler is draining, 0 executions in flight"
+        assert lifecycle.tracker.draining
+
+        result = await client.call_tool("get_runtime_status")
+        assert "'draining': True" in result.content[0].text
+
+    mocker.patch("src.main.envs.SNAPSHOT_PATH", None)
+    await start_scheduler()
+    try:
+        # drained before the start, so no job fires
+        assert scheduler.state == STATE_PAUSED
+    finally:
+        scheduler.shutdown(wait=False)
+
+
+async def test_snapshot_is_kept_when_restore_fails(mocker, tmp_path):
+    path = tmp_path / "snapshot.pkl"
+    path.write_bytes(b"saved jobs")
+    mocker.patch("src.main.envs.SNAPSHOT_PATH", str(path))
+    mocker.patch("src.main._snapshot_load_failed", False)
+    mocker.patch("src.main.scheduler", AsyncIOScheduler(timezone=timezone.utc))
+    mocker.patch("lifecycle.tracker", lifecycle.ExecutionTracker())
+    mocker.patch("lifecycle.load_snapshot", side_effect=OSError("disk error"))
+
+    await start_scheduler()
+    await shutdown()
+
+    assert path.read_bytes() == b"saved jobs"
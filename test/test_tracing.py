@@ -0,0 +1,145 @@
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import mcp_client
+import tracing
+from src.main import execute_plan
+
+
+PLAN = '{"action_1": {"mcp-service-endpoint": "http://localhost:8000", "mcp-tool-name": "test_tool", "mcp-tool-arguments": {"arg1": "value1"}}}'
+
+
+class StubClient:
+    """fastmcp `Client` that records how it is entered and exited."""
+
+    def __init__(self, endpoint, error=None):
+        self.endpoint = endpoint
+        self.error = error
+        self.exit_args = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.exit_args = (exc_type, exc)
+
+    async def call_tool_mcp(self, name, arguments):
+        if self.error is not None:
+            raise self.error
+        return "result"
+
+
+@pytest.fixture
+def export_path(mocker, tmp_path):
+    path = tmp_path / "spans.otlp.jsonl"
+    mocker.patch("src.main.envs.TRACING_ENABLED", True)
+    mocker.patch("src.main.envs.TRACING_SAMPLE_RATIO", 1.0)
+    mocker.patch("src.main.envs.TRACING_EXPORT_PATH", str(path))
+    mocker.patch("tracing._exporter", None)
+    return path
+
+
+def read_spans(path):
+    spans = []
+    for line in path.read_text().splitlines():
+        for resource_spans in json.loads(line)["resourceSpans"]:
+            for scope_spans in resource_spans["scopeSpans"]:
+                spans.extend(scope_spans["spans"])
+    return {span["name"]: span for span in spans}
+
+
+class TestTracing:
+    def test_disabled_returns_noop_span(self):
+        assert tracing.span("test") is tracing.NOOP_SPAN
+
+    def test_nested_spans_are_exported(self, export_path):
+        with tracing.span("parent", attributes={"user.id": "user_123"}):
+            with tracing.span("child"):
+                pass
+
+        spans = read_spans(export_path)
+        assert spans["child"]["parentSpanId"] == spans["parent"]["spanId"]
+        assert spans["child"]["traceId"] == spans["parent"]["traceId"]
+        assert "parentSpanId" not in spans["parent"]
+        assert spans["parent"]["attributes"] == [
+            {"key": "user.id", "value": {"stringValue": "user_123"}}
+        ]
+
+    def test_error_status(self, export_path):
+        with pytest.raises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("boom")
+
+        status = read_spans(export_path)["failing"]["status"]
+        assert status == {"code": tracing.STATUS_ERROR, "message": "ValueError: boom"}
+
+    def test_not_sampled(self, export_path, mocker):
+        mocker.patch("src.main.envs.TRACING_SAMPLE_RATIO", 0.0)
+
+        with tracing.span("parent"):
+            assert tracing.span("child") is tracing.NOOP_SPAN
+
+        assert not export_path.exists()
+
+    async def test_execute_plan_phases(self, export_path, mocker):
+        mocker.patch("mcp_client.call_tool")
+        scheduled_run_time = datetime.now(timezone.utc)
+        token = tracing.current_job_run.set(
+            tracing.JobRun("job_123", scheduled_run_time, time.time_ns())
+        )
+        try:
+            await execute_plan(PLAN, user_id="user_123", description="test")
+        finally:
+            tracing.current_job_run.reset(token)
+
+        spans = read_spans(export_path)
+        assert set(spans) == {
+            "scheduler.job",
+            "scheduler.trigger_fire",
+            "scheduler.queue_wait",
+            "plan.unpack",
+            "plan.decode",
+            "plan.action",
+        }
+        root = spans["scheduler.job"]
+        assert {"key": "job.id", "value": {"stringValue": "job_123"}} in root[
+            "attributes"
+        ]
+        assert {"key": "action.id", "value": {"stringValue": "action_1"}} in spans[
+            "plan.action"
+        ]["attributes"]
+        assert all(
+            span["parentSpanId"] == root["spanId"]
+            for name, span in spans.items()
+            if name != "scheduler.job"
+        )
+
+    async def test_mcp_call_phases(self, export_path, mocker):
+        client = StubClient("http://localhost:8000")
+        mocker.patch("fastmcp.client.Client", return_value=client)
+
+        await execute_plan(PLAN, user_id="user_123", description="test")
+
+        spans = read_spans(export_path)
+        action = spans["plan.action"]
+        assert {"mcp.connect", "mcp.tool_call", "mcp.teardown"} <= set(spans)
+        for name in ("mcp.connect", "mcp.tool_call", "mcp.teardown"):
+            assert spans[name]["parentSpanId"] == action["spanId"]
+        assert client.exit_args == (None, None)
+
+    async def test_mcp_call_error_tears_down(self, export_path, mocker):
+        error = RuntimeError("tool failed")
+        client = StubClient("http://localhost:8000", error=error)
+        mocker.patch("fastmcp.client.Client", return_value=client)
+
+        with pytest.raises(RuntimeError) as raised:
+            await mcp_client.call_tool("http://localhost:8000", "test_tool", {})
+
+        assert raised.value is error
+        assert client.exit_args == (RuntimeError, error)
+        spans = read_spans(export_path)
+        assert spans["mcp.tool_call"]["status"]["code"] == tracing.STATUS_ERROR
+        assert spans["mcp.teardown"]["status"] == {"code": tracing.STATUS_OK}